@@ -14,6 +14,16 @@ METADATA_DEF_KEYS = ['description', 'paper_name', 'paper_link', 'timing',
 OBNOW = 'ob_unknown_yet'  # TODO: temporary hack to create constant placeholder
 
 
+def _import_torch():
+    """Import torch, an optional dependency used by TrialEnv.ob_tensor."""
+    try:
+        import torch
+    except ImportError:
+        raise ImportError('ob_tensor requires PyTorch, install it with '
+                          'pip install neurogym[torch]')
+    return torch
+
+
 def _clean_string(string):
     return ' '.join(string.replace('\n', '').split())
 
@@ -81,6 +91,19 @@ class BaseEnv(gym.Env):
         self.rewards = {}
         self.rng = np.random.RandomState()
 
+    @property
+    def tmax(self):
+        """Maximum time of the current trial."""
+        return self._tmax_time
+
+    @tmax.setter
+    def tmax(self, tmax):
+        self._tmax_time = tmax
+        # Number of steps before the trial times out, so that step can test
+        # the integer t_ind instead of the float time. Round away float
+        # error first, with a non-integer dt n * dt / dt can fall below n
+        self._tmax_ind = int(round(tmax / self.dt, 6))
+
     def seed(self, seed=None):
         """Set random seed."""
         self.rng = np.random.RandomState(seed)
@@ -114,7 +137,16 @@ class TrialEnv(BaseEnv):
         self.end_t = dict()
         self.start_ind = dict()
         self.end_ind = dict()
-        self._tmax = 0  # Length of each trial
+        # Trial length: _tmax is the end time of the latest period added,
+        # tmax (stored in _tmax_time) is _tmax rounded down to a multiple of
+        # dt, and _tmax_ind is tmax in steps, when step times the trial out
+        self._tmax = 0
+        # ob and gt are views into these, reused across trials
+        self._ob_buffer = None
+        self._gt_buffer = None
+        self._pin_ob = False  # allocate the ob buffer in pinned memory
+        self._ob_torch = None  # (ob, torch tensor sharing its memory)
+        self._ob_buffer_torch = None  # same for the ob buffer
 
         self._top = self
 
@@ -181,7 +213,12 @@ class TrialEnv(BaseEnv):
         return trial
 
     def step(self, action):
-        """Public interface for the environment."""
+        """Public interface for the environment.
+
+        The returned ob and, for non-scalar action spaces, info['gt'] are
+        copies of the current rows of the trial's ob and gt. The trials
+        themselves are built in buffers reused by the following trials.
+        """
         ob, reward, done, info = self._step(action)
 
         if 'new_trial' not in info:
@@ -191,11 +228,17 @@ class TrialEnv(BaseEnv):
             # If gt is built, default gt to gt_now
             # must run before incrementing t
             info['gt'] = self.gt_now
+        gt = info.get('gt')
+        if (isinstance(gt, np.ndarray) and
+                np.may_share_memory(gt, self._gt_buffer)):
+            # Following trials overwrite the gt buffer
+            info['gt'] = gt.copy()
 
         self.t += self.dt  # increment within trial time count
         self.t_ind += 1
 
-        if self.t + self.dt > self.tmax and not info['new_trial']:
+        # Same as self.t + self.dt > self.tmax
+        if self.t_ind >= self._tmax_ind and not info['new_trial']:
             info['new_trial'] = True
             reward += self.r_tmax
 
@@ -207,7 +250,11 @@ class TrialEnv(BaseEnv):
             self.performance = 0
             info['trial'] = trial
         if ob is OBNOW:
-            ob = self.ob[self.t_ind]
+            # Copy the row, following trials overwrite the ob buffer
+            ob = self.ob[self.t_ind].copy()
+        elif (isinstance(ob, np.ndarray) and
+                np.may_share_memory(ob, self._ob_buffer)):
+            ob = ob.copy()
         return self.post_step(ob, reward, done, info)
 
     def reset(self, step_fn=None, no_step=False):
@@ -324,22 +371,106 @@ class TrialEnv(BaseEnv):
         self._tmax = max(self._tmax, start + duration)
         self.tmax = int(self._tmax/self.dt) * self.dt
 
+    @staticmethod
+    def _view_buffer(buffer, tmax_ind, shape, dtype):
+        """Return buffer, reallocated if it cannot hold tmax_ind steps."""
+        if (buffer is None or buffer.shape[0] < tmax_ind or
+                buffer.shape[1:] != tuple(shape) or buffer.dtype != dtype):
+            buffer = np.empty([tmax_ind] + list(shape), dtype=dtype)
+        return buffer
+
     def _init_ob(self):
-        """Initialize trial info with tmax, tind, ob"""
+        """Initialize trial info with tmax, tind, ob
+
+        ob is a view into a buffer that is reused by the following trials,
+        copy it to keep it. step already returns copies of its rows.
+        """
         tmax_ind = int(self._tmax/self.dt)
-        ob_shape = [tmax_ind] + list(self.observation_space.shape)
+        buffer = self._view_buffer(
+            self._ob_buffer, tmax_ind, self.observation_space.shape,
+            self.observation_space.dtype)
+        if self._pin_ob and buffer is not self._ob_buffer:
+            buffer, tensor = self._pin(buffer)
+            self._ob_buffer_torch = (buffer, tensor)
+        self._ob_buffer = buffer
+        self.ob = self._ob_buffer[:tmax_ind]
         if self._default_ob_value is None:
-            self.ob = np.zeros(ob_shape, dtype=self.observation_space.dtype)
+            self.ob[...] = 0
         else:
-            self.ob = np.full(ob_shape, self._default_ob_value,
-                              dtype=self.observation_space.dtype)
+            self.ob[...] = self._default_ob_value
         self._ob_built = True
 
+    def _pin(self, array):
+        """Copy array to pinned memory, return it and a tensor sharing it."""
+        torch = _import_torch()
+        dtype = torch.from_numpy(np.empty(0, dtype=array.dtype)).dtype
+        tensor = torch.empty(array.shape, dtype=dtype, pin_memory=True)
+        pinned = tensor.numpy()
+        pinned[...] = array
+        return pinned, tensor
+
+    def ob_tensor(self, pin_memory=False):
+        """Observation of the current trial as a torch tensor.
+
+        The tensor shares memory with ob, nothing is copied. It is built once
+        per trial, then returned from a cache. With pin_memory=True, ob is
+        moved once to pinned memory, so that the tensor can be copied to the
+        GPU with .to(device, non_blocking=True). Requires torch.
+        """
+        ob = getattr(self, 'ob', None)
+        if ob is None:
+            raise ValueError('ob_tensor needs a trial, call reset or '
+                             'new_trial first')
+        if pin_memory and not self._pin_ob:
+            buffer = self._ob_buffer
+            if buffer is not None and np.may_share_memory(ob, buffer):
+                # Later buffers are allocated in pinned memory as well
+                pinned, tensor = self._pin(buffer)
+                self._ob_buffer = pinned
+                self._ob_buffer_torch = (pinned, tensor)
+                self.ob = pinned[:ob.shape[0]]
+            else:
+                # ob was assigned by the task, only this one can be pinned
+                self.ob, tensor = self._pin(ob)
+                self._ob_torch = (self.ob, tensor)
+            self._pin_ob = True
+        ob = self.ob
+        if self._ob_torch is None or self._ob_torch[0] is not ob:
+            torch = _import_torch()
+            buffer = self._ob_buffer
+            if buffer is not None and np.may_share_memory(ob, buffer):
+                if (self._ob_buffer_torch is None or
+                        self._ob_buffer_torch[0] is not buffer):
+                    self._ob_buffer_torch = (buffer, torch.from_numpy(buffer))
+                tensor = self._ob_buffer_torch[1][:ob.shape[0]]
+            else:
+                # ob was not built in the buffer, e.g. assigned by the task
+                tensor = torch.from_numpy(ob)
+            self._ob_torch = (ob, tensor)
+        return self._ob_torch[1]
+
+    def ob_tensor_row(self, i):
+        """Observation at step i as a torch tensor sharing memory with ob.
+
+        After step, ob_tensor_row(env.t_ind) is the returned ob.
+        """
+        return self.ob_tensor()[i]
+
+    def __getstate__(self):
+        # Tensors alias the ob buffer, copies rebuild them from their own
+        state = self.__dict__.copy()
+        state['_ob_torch'] = state['_ob_buffer_torch'] = None
+        state['_pin_ob'] = False
+        return state
+
     def _init_gt(self):
         """Initialize trial with ground_truth."""
         tmax_ind = int(self._tmax / self.dt)
-        self.gt = np.zeros([tmax_ind] + list(self.action_space.shape),
-                           dtype=self.action_space.dtype)
+        self._gt_buffer = self._view_buffer(
+            self._gt_buffer, tmax_ind, self.action_space.shape,
+            self.action_space.dtype)
+        self.gt = self._gt_buffer[:tmax_ind]
+        self.gt[...] = 0
         self._gt_built = True
 
     def view_ob(self, period=None):
@@ -407,12 +538,19 @@ class TrialEnv(BaseEnv):
 
         ob = self.view_ob(period=period)
         if where is None:
-            ob += mu + self.rng.randn(*ob.shape) * sigma
+            ob += self._randn(ob.shape, mu, sigma)
         else:
             if isinstance(where, str):
                 where = self.observation_space.name[where]
             # TODO: This only works if the slicing is one one-dimension
-            ob[..., where] += mu + self.rng.randn(*ob[..., where].shape) * sigma
+            ob[..., where] += self._randn(ob[..., where].shape, mu, sigma)
+
+    def _randn(self, shape, mu=0, sigma=1):
+        """Draw normal noise, scaled in place to avoid temporaries."""
+        noise = self.rng.standard_normal(shape)
+        noise *= sigma
+        noise += mu
+        return noise
 
     def set_ob(self, value, period=None, where=None):
         self._add_ob(value, period, where, reset=True)
@@ -442,7 +580,8 @@ class TrialEnv(BaseEnv):
     def in_period(self, period, t=None):
         """Check if current time or time t is in period"""
         if t is None:
-            t = self.t  # Default
+            # Compare integer step indices, the same way ob and gt are indexed
+            return self.start_ind[period] <= self.t_ind < self.end_ind[period]
         return self.start_t[period] <= t < self.end_t[period]
 
     @property
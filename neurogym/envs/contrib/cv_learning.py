@@ -4,7 +4,6 @@
 import numpy as np
 from gym import spaces
 import neurogym as ngym
-import matplotlib.pyplot as plt
 
 
 class CVLearning(ngym.TrialEnv):
@@ -333,6 +332,7 @@ class CVLearning(ngym.TrialEnv):
 
 
 if __name__ == '__main__':
+    import matplotlib.pyplot as plt
     plt.close('all')
     env = CVLearning(stages=[0, 2, 3, 4], trials_day=2, keep_days=1)
     data = ngym.utils.plot_env(env, num_steps=200)
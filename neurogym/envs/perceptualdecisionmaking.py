@@ -1,12 +1,100 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import functools
+
 import numpy as np
 
 import neurogym as ngym
 from neurogym import spaces
 
 
+def _build_ob_numpy(ob, fix_end, stim_start, stim_end, stim, noise, sigma):
+    """Write fixation input and noisy stimulus into a trial ob in place.
+
+    Args:
+        ob: np array (n_step, 1+dim_ring), observation of the trial
+        fix_end: int, index where the fixation input ends
+        stim_start, stim_end: int, indices of the stimulus period
+        stim: np array (dim_ring,), mean stimulus
+        noise: np array (n_step_stim, dim_ring), standard normal, only the
+            first stim_end-stim_start steps are used
+        sigma: float, noise level
+    """
+    ob[:fix_end, 0] = 1
+    ob_stim = ob[stim_start:stim_end, 1:]
+    # Scale the noise straight into ob, then add the stimulus, no temporary
+    np.multiply(noise[:stim_end - stim_start], sigma, out=ob_stim)
+    ob_stim += stim
+
+
+def _quantize(ob_float, ob, scale):
+    """Write ob_float * scale, rounded and clipped, into integer ob.
+
+    ob_float is modified in place.
+    """
+    iinfo = np.iinfo(ob.dtype)
+    ob_float *= scale
+    np.rint(ob_float, out=ob_float)
+    np.clip(ob_float, iinfo.min, iinfo.max, out=ob_float)
+    ob[...] = ob_float
+
+
+def _build_ob_batch_numpy(ob, idx, fix_end, stim_start, stim_end, stim, noise,
+                          sigma):
+    """Run _build_ob on ob[idx[k]] for every k.
+
+    All arguments but ob, idx and sigma have one entry per k, noise is
+    (len(idx), n_step_stim, dim_ring).
+    """
+    for k in range(len(idx)):
+        _build_ob(ob[idx[k]], fix_end[k], stim_start[k], stim_end[k],
+                  stim[k], noise[k], sigma)
+
+
+@functools.lru_cache(maxsize=None)
+def _builders():
+    """Return the ob builders, compiled with numba if it is installed.
+
+    numba is imported on first use: it is slow to import, and registering
+    the envs imports every env module.
+    """
+    try:
+        from numba import njit, prange
+    except ImportError:
+        return _build_ob_numpy, _build_ob_batch_numpy
+
+    @njit(cache=True, fastmath=True)
+    def build_ob(ob, fix_end, stim_start, stim_end, stim, noise, sigma):
+        # Same as _build_ob_numpy, in a single pass over the trial
+        for i in range(fix_end):
+            ob[i, 0] = 1
+        for i in range(stim_end - stim_start):
+            for j in range(stim.shape[0]):
+                ob[stim_start + i, 1 + j] = stim[j] + noise[i, j] * sigma
+
+    @njit(cache=True, fastmath=True, parallel=True)
+    def build_ob_batch(ob, idx, fix_end, stim_start, stim_end, stim, noise,
+                       sigma):
+        # Same as _build_ob_batch_numpy, trials are built in parallel
+        for k in prange(len(idx)):
+            build_ob(ob[idx[k]], fix_end[k], stim_start[k], stim_end[k],
+                     stim[k], noise[k], sigma)
+
+    return build_ob, build_ob_batch
+
+
+def _build_ob(ob, fix_end, stim_start, stim_end, stim, noise, sigma):
+    """Same as _build_ob_numpy, compiled with numba if it is installed."""
+    _builders()[0](ob, fix_end, stim_start, stim_end, stim, noise, sigma)
+
+
+def _build_ob_batch(ob, idx, fix_end, stim_start, stim_end, stim, noise,
+                    sigma):
+    """Same as _build_ob_batch_numpy, compiled with numba if installed."""
+    _builders()[1](ob, idx, fix_end, stim_start, stim_end, stim, noise, sigma)
+
+
 class PerceptualDecisionMaking(ngym.TrialEnv):
     """Two-alternative forced choice task in which the subject has to
     integrate two stimuli to decide which one is higher on average.
@@ -21,6 +109,10 @@ class PerceptualDecisionMaking(ngym.TrialEnv):
             the task
         sigma: float, input noise level
         dim_ring: int, dimension of ring input and output
+        ob_dtype: np.float32 or np.int8, dtype of observations. If int8,
+            observations are stored as round(ob_scale * ob) with ob_scale
+            127, clipped to the int8 range, to reduce memory traffic (e.g.
+            into rollout buffers). Divide by env.ob_scale to recover them.
     """
     metadata = {
         'paper_link': 'https://www.jneurosci.org/content/12/12/4745',
@@ -30,7 +122,7 @@ class PerceptualDecisionMaking(ngym.TrialEnv):
     }
 
     def __init__(self, dt=100, rewards=None, timing=None, cohs=None,
-                 sigma=1.0, dim_ring=2):
+                 sigma=1.0, dim_ring=2, ob_dtype=np.float32):
         super().__init__(dt=dt)
         if cohs is None:
             self.cohs = np.array([0, 6.4, 12.8, 25.6, 51.2])
@@ -56,9 +148,21 @@ class PerceptualDecisionMaking(ngym.TrialEnv):
         self.theta = np.linspace(0, 2*np.pi, dim_ring+1)[:-1]
         self.choices = np.arange(dim_ring)
 
+        ob_dtype = np.dtype(ob_dtype)
+        if ob_dtype == np.float32:
+            self.ob_scale = 1
+            low, high = -np.inf, np.inf
+        elif ob_dtype == np.int8:
+            self.ob_scale = 127
+            low, high = -128, 127
+        else:
+            raise ValueError('ob_dtype must be float32 or int8, got ' +
+                             str(ob_dtype))
+        self._ob_float = None  # float32 buffer to build quantized ob
+
         name = {'fixation': 0, 'stimulus': range(1, dim_ring+1)}
         self.observation_space = spaces.Box(
-            -np.inf, np.inf, shape=(1+dim_ring,), dtype=np.float32, name=name)
+            low, high, shape=(1+dim_ring,), dtype=ob_dtype, name=name)
         name = {'fixation': 0, 'choice': range(1, dim_ring+1)}
         self.action_space = spaces.Discrete(1+dim_ring, name=name)
 
@@ -74,9 +178,10 @@ class PerceptualDecisionMaking(ngym.TrialEnv):
             obs: observation
         """
         # Trial info
+        # Index with randint, same draws as rng.choice without its overhead
         trial = {
-            'ground_truth': self.rng.choice(self.choices),
-            'coh': self.rng.choice(self.cohs),
+            'ground_truth': self.choices[self.rng.randint(len(self.choices))],
+            'coh': self.cohs[self.rng.randint(len(self.cohs))],
         }
         trial.update(kwargs)
 
@@ -88,10 +193,24 @@ class PerceptualDecisionMaking(ngym.TrialEnv):
         self.add_period(['fixation', 'stimulus', 'delay', 'decision'])
 
         # Observations
-        self.add_ob(1, period=['fixation', 'stimulus', 'delay'], where='fixation')
+        # Periods are contiguous from t=0, so write slices directly instead
+        # of going through add_ob/add_randn once per period.
         stim = np.cos(self.theta - stim_theta) * (coh/200) + 0.5
-        self.add_ob(stim, 'stimulus', where='stimulus')
-        self.add_randn(0, self.sigma, 'stimulus', where='stimulus')
+        stim_start = self.start_ind['stimulus']
+        stim_end = self.end_ind['stimulus']
+        noise = self.rng.standard_normal((stim_end - stim_start, len(stim)))
+        ob = self.view_ob()
+        if self.ob_scale == 1:
+            ob_float = ob
+        else:
+            self._ob_float = self._view_buffer(
+                self._ob_float, ob.shape[0], ob.shape[1:], np.float32)
+            ob_float = self._ob_float[:ob.shape[0]]
+            ob_float[...] = 0
+        _build_ob(ob_float, self.end_ind['delay'], stim_start, stim_end,
+                  stim, noise, self.sigma)
+        if ob_float is not ob:
+            _quantize(ob_float, ob, self.ob_scale)
 
         # Ground truth
         self.set_groundtruth(ground_truth, period='decision', where='choice')
@@ -111,13 +230,18 @@ class PerceptualDecisionMaking(ngym.TrialEnv):
         new_trial = False
         # rewards
         reward = 0
-        gt = self.gt_now
+        # Bind attributes used more than once to locals, and test periods
+        # inline (same as in_period) since this runs on every step
+        t_ind = self.t_ind
+        start_ind = self.start_ind
+        end_ind = self.end_ind
+        gt = self.gt[t_ind]
         # observations
-        if self.in_period('fixation'):
+        if start_ind['fixation'] <= t_ind < end_ind['fixation']:
             if action != 0:  # action = 0 means fixating
                 new_trial = self.abort
                 reward += self.rewards['abort']
-        elif self.in_period('decision'):
+        elif start_ind['decision'] <= t_ind < end_ind['decision']:
             if action != 0:
                 new_trial = True
                 if action == gt:
@@ -129,6 +253,203 @@ class PerceptualDecisionMaking(ngym.TrialEnv):
         return self.ob_now, reward, False, {'new_trial': new_trial, 'gt': gt}
 
 
+class BatchPerceptualDecisionMaking(object):
+    """A batch of PerceptualDecisionMaking tasks stepped together.
+
+    Every environment runs its own trials, but trials are stored as
+    (n_envs, n_step, ...) arrays so that a single batch_step call advances
+    all environments with a few vectorized operations. Trials that end are
+    regenerated independently by batch_new_trial.
+
+    Args:
+        n_envs: int, number of environments in the batch
+        **kwargs: passed to PerceptualDecisionMaking
+    """
+    periods = ['fixation', 'stimulus', 'delay', 'decision']
+    # Phase of each step, fixation, stimulus or delay, decision
+    FIXATION, STIMULUS, DECISION = 0, 1, 2
+
+    def __init__(self, n_envs, **kwargs):
+        # Template task, provides parameters, spaces, timing and the rng
+        self.env = PerceptualDecisionMaking(**kwargs)
+        self.n_envs = n_envs
+        self.observation_space = self.env.observation_space
+        self.action_space = self.env.action_space
+        self.rewards = self.env.rewards
+
+        self.t_ind = np.zeros(n_envs, dtype=int)
+        self.tmax_ind = np.zeros(n_envs, dtype=int)
+        self.ground_truth = np.zeros(n_envs, dtype=int)
+        self.coh = np.zeros(n_envs)
+        self.performance = np.zeros(n_envs)
+        self.start_ind = {p: np.zeros(n_envs, dtype=int) for p in self.periods}
+        self.end_ind = {p: np.zeros(n_envs, dtype=int) for p in self.periods}
+        self.ob = np.zeros((n_envs, 0) + self.observation_space.shape,
+                           dtype=self.observation_space.dtype)
+        self.gt = np.zeros((n_envs, 0), dtype=self.action_space.dtype)
+        self.phase = np.zeros((n_envs, 0), dtype=np.uint8)
+        # Allocated once, batch_step returns the same read-only done array
+        self._envs = np.arange(n_envs)
+        self._done = np.zeros(n_envs, dtype=bool)
+        self._done.flags.writeable = False
+
+        # Reward and new_trial for each (phase, outcome), where the outcome
+        # is 0 for fixating, 1 for a wrong choice and 2 for a correct one.
+        # Entries set from rewards and env.abort are filled by batch_step.
+        self._reward_table = np.zeros((3, 3))
+        self._new_trial_table = np.array([
+            [False, False, False],
+            [False, False, False],
+            [False, True, True]])
+
+    @property
+    def rng(self):
+        return self.env.rng
+
+    def seed(self, seed=None):
+        """Set random seed."""
+        return self.env.seed(seed)
+
+    def _grow(self, tmax_ind):
+        """Make room for trials of up to tmax_ind steps."""
+        n_step = self.ob.shape[1]
+        if tmax_ind <= n_step:
+            return
+        ob = np.zeros((self.n_envs, tmax_ind) + self.ob.shape[2:],
+                      dtype=self.ob.dtype)
+        ob[:, :n_step] = self.ob
+        gt = np.zeros((self.n_envs, tmax_ind), dtype=self.gt.dtype)
+        gt[:, :n_step] = self.gt
+        phase = np.zeros((self.n_envs, tmax_ind), dtype=self.phase.dtype)
+        phase[:, :n_step] = self.phase
+        self.ob, self.gt, self.phase = ob, gt, phase
+
+    def batch_new_trial(self, mask=None):
+        """Start new trials for the environments where mask is True.
+
+        Args:
+            mask: bool np array (n_envs,) or None. If None, all environments
+                start a new trial.
+
+        Returns:
+            trial: dict of trial information, arrays over the new trials
+        """
+        if mask is None:
+            idx = np.arange(self.n_envs)
+        else:
+            idx = np.flatnonzero(mask)
+        n = len(idx)
+        env = self.env
+        if n == 0:
+            return {'ground_truth': np.zeros(0, dtype=int), 'coh': np.zeros(0)}
+
+        trial = {
+            'ground_truth': env.choices[env.rng.randint(len(env.choices),
+                                                        size=n)],
+            'coh': np.asarray(env.cohs)[env.rng.randint(len(env.cohs),
+                                                         size=n)],
+        }
+        self.ground_truth[idx] = trial['ground_truth']
+        self.coh[idx] = trial['coh']
+
+        # Periods, laid out back to back as in TrialEnv.add_period
+        start = np.zeros(n)
+        for period in self.periods:
+            duration = np.array([env.sample_time(period) for _ in range(n)])
+            self.start_ind[period][idx] = (start / env.dt).astype(int)
+            self.end_ind[period][idx] = ((start + duration) / env.dt).astype(int)
+            start = start + duration
+        self.tmax_ind[idx] = (start / env.dt).astype(int)
+        self._grow(self.tmax_ind[idx].max())
+
+        # Observations, written per environment with integer slices
+        fix_end = self.end_ind['delay'][idx]
+        stim_start = self.start_ind['stimulus'][idx]
+        stim_end = self.end_ind['stimulus'][idx]
+        stim = np.cos(env.theta - env.theta[trial['ground_truth'], None])
+        stim = stim * (trial['coh'][:, None]/200) + 0.5
+        # Noise is only drawn for stimulus steps
+        noise = env.rng.standard_normal(
+            (n, (stim_end - stim_start).max(), len(env.theta)))
+        if env.ob_scale == 1:
+            self.ob[idx] = 0
+            _build_ob_batch(self.ob, idx, fix_end, stim_start, stim_end,
+                            stim, noise, env.sigma)
+        else:
+            ob_float = np.empty(self.ob.shape[1:], dtype=np.float32)
+            for k, i in enumerate(idx):
+                ob_float[...] = 0
+                _build_ob(ob_float, fix_end[k], stim_start[k], stim_end[k],
+                          stim[k], noise[k], env.sigma)
+                _quantize(ob_float, self.ob[i], env.ob_scale)
+
+        # Ground truth and phase
+        choice = np.asarray(env.action_space.name['choice'])
+        self.gt[idx] = 0
+        self.phase[idx] = self.STIMULUS
+        for k, i in enumerate(idx):
+            decision = slice(self.start_ind['decision'][i],
+                             self.end_ind['decision'][i])
+            self.gt[i, decision] = choice[trial['ground_truth'][k]]
+            self.phase[i, :self.end_ind['fixation'][i]] = self.FIXATION
+            self.phase[i, decision] = self.DECISION
+
+        self.t_ind[idx] = 0
+        self.performance[idx] = 0
+        return trial
+
+    def reset(self):
+        """Start new trials in all environments and return first ob."""
+        self.batch_new_trial()
+        # Gathered into a new array like in batch_step, later trials
+        # overwrite self.ob
+        return self.ob[self._envs, 0]
+
+    def batch_step(self, actions):
+        """Step all environments.
+
+        Args:
+            actions: int np array (n_envs,)
+
+        Returns:
+            ob: np array (n_envs, ob_size), observations
+            reward: np array (n_envs,)
+            done: bool np array (n_envs,), always False, read-only
+            info: dict of arrays, gt and new_trial, plus performance of the
+                previous trials if any trial ended
+        """
+        actions = np.asarray(actions)
+        envs = self._envs
+        gt = self.gt[envs, self.t_ind]
+        phase = self.phase[envs, self.t_ind]
+
+        # Read rewards and abort on every step, they may be changed after
+        # construction like in the single-env task
+        self._reward_table[self.FIXATION, 1:] = self.rewards['abort']
+        self._reward_table[self.DECISION, 1] = self.rewards['fail']
+        self._reward_table[self.DECISION, 2] = self.rewards['correct']
+        self._new_trial_table[self.FIXATION, 1:] = self.env.abort
+
+        # gt is 0 outside the decision period, so a response there is never
+        # counted as correct
+        outcome = (actions != 0) * (1 + (actions == gt))
+        reward = self._reward_table[phase, outcome]
+        new_trial = self._new_trial_table[phase, outcome]
+        self.performance[(phase == self.DECISION) & (outcome == 2)] = 1
+
+        self.t_ind += 1
+        timeout = (self.t_ind >= self.tmax_ind) & ~new_trial
+        reward[timeout] += self.env.r_tmax
+        new_trial = new_trial | timeout
+
+        info = {'new_trial': new_trial, 'gt': gt}
+        if new_trial.any():
+            info['performance'] = self.performance.copy()
+            info['trial'] = self.batch_new_trial(new_trial)
+        ob = self.ob[envs, self.t_ind]
+        return ob, reward, self._done, info
+
+
 #  TODO: there should be a timeout of 1000ms for incorrect trials
 class PerceptualDecisionMakingDelayResponse(ngym.TrialEnv):
     """Perceptual decision-making with delayed responses.
@@ -182,9 +503,10 @@ class PerceptualDecisionMakingDelayResponse(ngym.TrialEnv):
         # ---------------------------------------------------------------------
         # Trial
         # ---------------------------------------------------------------------
+        # Index with randint, same draws as rng.choice without its overhead
         trial = {
-            'ground_truth': self.rng.choice(self.choices),
-            'coh': self.rng.choice(self.cohs),
+            'ground_truth': self.choices[self.rng.randint(len(self.choices))],
+            'coh': self.cohs[self.rng.randint(len(self.cohs))],
             'sigma': self.sigma,
         }
         trial.update(kwargs)
@@ -196,15 +518,14 @@ class PerceptualDecisionMakingDelayResponse(ngym.TrialEnv):
         self.add_period(periods)
 
         # define observations
-        self.set_ob([1, 0, 0], 'fixation')
+        ob = self.view_ob()
+        ob[:self.end_ind['delay'], 0] = 1
         stim = self.view_ob('stimulus')
-        stim[:, 0] = 1
-        stim[:, 1:] = (1 - trial['coh']/100)/2
-        stim[:, trial['ground_truth']] = (1 + trial['coh']/100)/2
-        stim[:, 1:] +=\
-            self.rng.randn(stim.shape[0], 2) * trial['sigma']
-
-        self.set_ob([1, 0, 0], 'delay')
+        # Mean of both stimuli, added to the noise in a single store
+        mean = np.full(2, (1 - trial['coh']/100)/2)
+        mean[trial['ground_truth'] - 1] = (1 + trial['coh']/100)/2
+        np.add(self._randn((stim.shape[0], 2), sigma=trial['sigma']), mean,
+               out=stim[:, 1:])
 
         self.set_groundtruth(trial['ground_truth'], 'decision')
 
@@ -1,6 +1,6 @@
 """Test core.py"""
 
-# import pytest
+import pytest
 
 import numpy as np
 import neurogym as ngym
@@ -70,3 +70,145 @@ def test_addob_instep():
     for i in range(10):
         ob, rew, done, info = env.step(action=0)
         assert ob[0] == ((i + 1) % 5) + 1  # each trial is 5 steps
+
+
+def test_timeout():
+    """Test trials time out and get r_tmax as with the float time check."""
+
+    class TestEnv(ngym.TrialEnv):
+        def __init__(self, dt=100, tmax=None, go=None):
+            super().__init__(dt=dt, r_tmax=-1)
+            self.timing = {'go': 500}
+            self._go = go  # fixed duration, not rounded to dt
+            self._fixed_tmax = tmax
+            self.observation_space = ngym.spaces.Box(
+                -np.inf, np.inf, shape=(1,), dtype=np.float32)
+            self.action_space = ngym.spaces.Discrete(2)
+
+        def _new_trial(self, **kwargs):
+            self.add_period('go', duration=self._go)
+            self.add_ob(1)
+            if self._fixed_tmax is not None:
+                self.tmax = self._fixed_tmax  # not a multiple of dt
+            return dict()
+
+        def _step(self, action):
+            return self.ob_now, 0, False, {'new_trial': False}
+
+    for tmax in [None, 350, 400]:
+        env = TestEnv(tmax=tmax)
+        env.reset(no_step=True)
+        for i in range(20):
+            # Time after this step plus dt beyond tmax
+            timeout = env.t + 2 * env.dt > env.tmax
+            ob, rew, done, info = env.step(action=0)
+            assert info['new_trial'] == timeout
+            assert rew == (-1 if timeout else 0)
+
+    # With an integer dt, registered tasks time out as with the float check
+    for env_name in ['PerceptualDecisionMaking-v0', 'DelayMatchSample-v0',
+                     'GoNogo-v0', 'ReadySetGo-v0']:
+        for dt in [20, 100]:
+            env = ngym.make(env_name, dt=dt).unwrapped
+            env.seed(0)
+            env.reset(no_step=True)
+            n_trials = 0
+            for i in range(1000):
+                timeout = env.t + 2 * env.dt > env.tmax
+                # Action 0 never ends these trials early
+                ob, rew, done, info = env.step(action=0)
+                assert info['new_trial'] == timeout
+                n_trials += info['new_trial']
+            assert n_trials > 1
+
+    # With a non-integer dt, trials last as many steps as ob has rows
+    for go in [None, 520, 1038]:
+        env = TestEnv(dt=8.3, go=go)
+        env.reset(no_step=True)
+        for trial in range(3):
+            n_step = env.ob.shape[0]
+            for i in range(n_step):
+                ob, rew, done, info = env.step(action=0)
+                assert info['new_trial'] == (i == n_step - 1)
+
+
+def test_ob_tensor():
+    """Test ob_tensor shares memory with ob across steps and trials."""
+    pytest.importorskip('torch')
+    env = ngym.make('PerceptualDecisionMaking-v0')
+    env.reset(no_step=True)
+    for i in range(100):
+        ob, rew, done, info = env.step(env.action_space.sample())
+        tensor = env.ob_tensor()
+        assert np.shares_memory(tensor.numpy(), env.ob)
+        assert np.array_equal(env.ob_tensor_row(env.t_ind).numpy(), ob)
+
+
+class _Tensor(np.ndarray):
+    """Stand-in for a torch tensor, an array view with a numpy method."""
+
+    def numpy(self):
+        return self.view(np.ndarray)
+
+
+def _fake_torch(pinned):
+    """Stand-in for the torch functions used by ob_tensor.
+
+    Arrays allocated with pin_memory=True are appended to pinned.
+    """
+    import types
+
+    def empty(shape, dtype, pin_memory=False):
+        array = np.empty(shape, dtype=dtype)
+        if pin_memory:
+            pinned.append(array)
+        return array.view(_Tensor)
+    return types.SimpleNamespace(
+        from_numpy=lambda array: array.view(_Tensor), empty=empty)
+
+
+def test_ob_tensor_cache(monkeypatch):
+    """Test the cached ob tensor follows ob across trials and copies."""
+    import copy
+    torch = _fake_torch([])
+    monkeypatch.setattr(ngym.core, '_import_torch', lambda: torch)
+    env = ngym.make('PerceptualDecisionMaking-v0').unwrapped
+    env.reset(no_step=True)
+    env.ob_tensor()
+    for task in [env, copy.deepcopy(env)]:
+        for i in range(100):
+            ob, rew, done, info = task.step(task.action_space.sample())
+            tensor = task.ob_tensor()
+            assert tensor is task.ob_tensor()
+            assert tensor.shape == task.ob.shape
+            assert np.shares_memory(tensor, task.ob)
+            assert np.array_equal(task.ob_tensor_row(task.t_ind), ob)
+
+
+def test_ob_tensor_pinned(monkeypatch):
+    """Test pinning ob built in the buffer or assigned by the task."""
+    pinned = []
+    torch = _fake_torch(pinned)
+    monkeypatch.setattr(ngym.core, '_import_torch', lambda: torch)
+
+    env = ngym.make('PerceptualDecisionMaking-v0').unwrapped
+    with pytest.raises(ValueError):
+        env.ob_tensor(pin_memory=True)
+    assert not env._pin_ob
+
+    for env_name in ['PerceptualDecisionMaking-v0', 'Bandit-v0']:
+        env = ngym.make(env_name).unwrapped
+        env.reset(no_step=True)
+        ob = env.ob.copy()
+        tensor = env.ob_tensor(pin_memory=True)
+        assert np.array_equal(tensor, ob)
+        assert np.shares_memory(tensor, env.ob)
+        assert np.shares_memory(env.ob, pinned[-1])
+        for i in range(20):
+            ob, rew, done, info = env.step(env.action_space.sample())
+            tensor = env.ob_tensor(pin_memory=True)
+            assert np.shares_memory(tensor, env.ob)
+            assert np.array_equal(env.ob_tensor_row(env.t_ind), ob)
+            if env._ob_buffer is not None:
+                # Trials built in the buffer stay in pinned memory
+                assert np.shares_memory(env.ob, pinned[-1])
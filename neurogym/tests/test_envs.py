@@ -117,7 +117,7 @@ def test_seeding(env=None, seed=0):
     for stp in range(100):
         action = env.action_space.sample()
         ob, rew, done, info = env.step(action)
-        ob_mat.append(ob)
+        ob_mat.append(np.array(ob))  # keep a copy of ob
         rew_mat.append(rew)
         act_mat.append(action)
         if done:
@@ -142,3 +142,202 @@ def test_seeding_all():
         # obs2, rews2 = test_seeding(env_name, seed=0)
         # assert (obs1 == obs2).all(), 'obs are not identical'
         # assert (rews1 == rews2).all(), 'rewards are not identical'
+
+
+def test_reactiontime():
+    """Test a response during the stimulus counts as a decision."""
+    from neurogym.envs.perceptualdecisionmaking import PerceptualDecisionMaking
+    from neurogym.wrappers import ReactionTime
+    env = ReactionTime(PerceptualDecisionMaking())
+    env.seed(0)
+    env.reset()
+    n_trials = 0
+    while n_trials < 10:
+        task = env.unwrapped
+        respond = task.t_ind == task.start_ind['stimulus'] + 1
+        action = task.trial['ground_truth'] + 1 if respond else 0
+        ob, rew, done, info = env.step(action)
+        if respond:
+            assert info['new_trial']
+            assert rew == task.rewards['correct']
+            n_trials += 1
+
+
+def test_step_copies():
+    """Test ob and gt from step are kept intact by later trials."""
+    for env_name in ['PerceptualDecisionMaking-v0', 'ReachingDelayResponse-v0']:
+        env = ngym.make(env_name, dt=20)
+        env.seed(0)
+        env.reset()
+        obs, gts, copies = [], [], []
+        for i in range(300):
+            ob, rew, done, info = env.step(env.action_space.sample())
+            obs.append(ob)
+            gts.append(info['gt'])
+            copies.append((np.array(ob), np.array(info['gt'])))
+        for ob, gt, (ob_copy, gt_copy) in zip(obs, gts, copies):
+            assert np.array_equal(ob, ob_copy)
+            assert np.array_equal(gt, gt_copy)
+
+
+def test_pass_wrappers_dtype():
+    """Test PassReward and PassAction keep the declared ob dtype."""
+    from neurogym.wrappers import PassReward, PassAction
+    for wrapper in [PassReward, PassAction]:
+        env = wrapper(ngym.make('PerceptualDecisionMaking-v0'))
+        env.seed(0)
+        ob = env.reset()
+        assert ob.dtype == env.observation_space.dtype
+        for i in range(20):
+            action = env.action_space.sample()
+            ob, rew, done, info = env.step(action)
+            assert ob.dtype == env.observation_space.dtype
+            assert ob[-1] == (rew if wrapper is PassReward else action)
+
+
+def test_run_env_gt():
+    """Test run_env keeps gt of earlier trials for Box action spaces."""
+    from neurogym.utils.plotting import run_env
+    env = ngym.make('ReachingDelayResponse-v0')
+    env.seed(0)
+    data = run_env(env, num_steps=300)
+    task = env.unwrapped
+    for gt in data['gt']:
+        assert not np.shares_memory(gt, task.gt)
+
+
+def test_build_ob():
+    """Test the (possibly numba-compiled) ob builder matches numpy."""
+    from neurogym.envs.perceptualdecisionmaking import (_build_ob,
+                                                        _build_ob_numpy)
+    rng = np.random.RandomState(0)
+    stim = np.array([0.3, 0.7])
+    noise = rng.randn(20, 2)
+    ob1 = np.zeros((30, 3), dtype=np.float32)
+    ob2 = np.zeros((30, 3), dtype=np.float32)
+    _build_ob(ob1, 25, 5, 25, stim, noise, 0.1)
+    _build_ob_numpy(ob2, 25, 5, 25, stim, noise, 0.1)
+    assert np.allclose(ob1, ob2, atol=1e-6)
+    assert (ob1[25:] == 0).all()
+
+
+def test_batch_perceptualdecisionmaking():
+    """Test the batched task matches PerceptualDecisionMaking."""
+    from neurogym.envs.perceptualdecisionmaking import (
+        PerceptualDecisionMaking, BatchPerceptualDecisionMaking)
+    kwargs = {'dt': 100, 'cohs': [51.2], 'sigma': 0.}
+    env = PerceptualDecisionMaking(**kwargs)
+    env.seed(0)
+    env.new_trial()
+    batch_env = BatchPerceptualDecisionMaking(4, **kwargs)
+    batch_env.seed(0)
+    batch_env.batch_new_trial()
+    n_step = env.ob.shape[0]
+    assert np.allclose(batch_env.ob[0, :n_step], env.ob)
+    assert (batch_env.gt[0, :n_step] == env.gt).all()
+
+    # Answering with the ground truth is always rewarded as correct
+    actions = np.zeros(4, dtype=int)
+    for i in range(100):
+        ob, rew, done, info = batch_env.batch_step(actions)
+        assert ob.shape == (4,) + env.observation_space.shape
+        assert (rew[info['gt'] != 0] == env.rewards['correct']).all()
+        actions = batch_env.gt[np.arange(4), batch_env.t_ind]
+
+
+def test_batch_step():
+    """Test batch_step against a per-env reference of TrialEnv.step."""
+    from neurogym.envs.perceptualdecisionmaking import (
+        BatchPerceptualDecisionMaking)
+    n_envs = 8
+    batch = BatchPerceptualDecisionMaking(n_envs, timing={'delay': 200})
+    batch.env.abort = True
+    batch.env.r_tmax = -0.5
+    batch.rewards['fail'] = -1.
+    batch.seed(0)
+    ob = batch.reset()
+    assert not np.shares_memory(ob, batch.ob)
+    rewards = batch.rewards
+    trial = batch.batch_new_trial(np.zeros(n_envs, dtype=bool))
+    assert len(trial['ground_truth']) == 0
+
+    rng = np.random.RandomState(0)
+    for _ in range(500):
+        # Mostly fixate, so that trials also reach the decision and time out
+        actions = rng.randint(1, 3, size=n_envs) * (rng.rand(n_envs) < 0.2)
+        t_ind = batch.t_ind.copy()
+        gt = batch.gt[np.arange(n_envs), t_ind]
+        reward = np.zeros(n_envs)
+        new_trial = np.zeros(n_envs, dtype=bool)
+        for i in range(n_envs):
+            t, action = t_ind[i], actions[i]
+            if t < batch.end_ind['fixation'][i] and action != 0:
+                reward[i] = rewards['abort']
+                new_trial[i] = batch.env.abort
+            elif (batch.start_ind['decision'][i] <= t <
+                  batch.end_ind['decision'][i] and action != 0):
+                reward[i] = rewards['correct' if action == gt[i] else 'fail']
+                new_trial[i] = True
+            if t + 1 >= batch.tmax_ind[i] and not new_trial[i]:
+                reward[i] += batch.env.r_tmax
+                new_trial[i] = True
+
+        ob, rew, done, info = batch.batch_step(actions)
+        assert np.allclose(rew, reward)
+        assert (info['new_trial'] == new_trial).all()
+        assert (info['gt'] == gt).all()
+        assert (batch.t_ind == np.where(new_trial, 0, t_ind + 1)).all()
+        assert np.array_equal(ob, batch.ob[np.arange(n_envs), batch.t_ind])
+
+
+def test_batch_abort():
+    """Test the batch reads abort and rewards set after construction."""
+    from neurogym.envs.perceptualdecisionmaking import (
+        BatchPerceptualDecisionMaking)
+    batch = BatchPerceptualDecisionMaking(4)
+    batch.env.abort = True
+    batch.rewards['abort'] = -5
+    batch.reset()
+    ob, reward, done, info = batch.batch_step(np.ones(4, dtype=int))
+    assert (reward == -5).all()
+    assert info['new_trial'].all()
+
+
+def test_quantized_ob():
+    """Test int8 observations match float ones up to rounding."""
+    from neurogym.envs.perceptualdecisionmaking import PerceptualDecisionMaking
+    env = PerceptualDecisionMaking()
+    env_q = PerceptualDecisionMaking(ob_dtype=np.int8)
+    env.seed(0)
+    env_q.seed(0)
+    env.new_trial()
+    env_q.new_trial()
+    assert env_q.ob.dtype == np.int8
+    assert env_q.observation_space.contains(env_q.ob[0])
+    ob = np.clip(env.ob, -128/127, 1)
+    assert np.abs(env_q.ob / env_q.ob_scale - ob).max() <= 0.5 / 127 + 1e-6
+
+
+def test_perceptualdecisionmaking_step():
+    """Test the inlined PerceptualDecisionMaking._step against in_period."""
+    from neurogym.envs.perceptualdecisionmaking import PerceptualDecisionMaking
+    for dim_ring in [2, 3, 5]:
+        env = PerceptualDecisionMaking(dim_ring=dim_ring)
+        env.abort = True
+        env.seed(0)
+        env.reset(no_step=True)
+        for i in range(1000):
+            action = env.action_space.sample()
+            reward, new_trial = 0, False
+            if env.in_period('fixation') and action != 0:
+                new_trial = env.abort
+                reward = env.rewards['abort']
+            elif env.in_period('decision') and action != 0:
+                new_trial = True
+                correct = action == env.gt_now
+                reward = env.rewards['correct' if correct else 'fail']
+            ob, rew, done, info = env._step(action)
+            assert rew == reward
+            assert info['new_trial'] == new_trial
+            assert info['gt'] == env.gt_now
+            env.step(action)
@@ -1,19 +1,24 @@
 """Plotting functions."""
 
+import functools
 import glob
 import numpy as np
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
 
 import gym
 
 
-# TODO: This is changing user's plotting behavior for non-neurogym plots
-mpl.rcParams['font.size'] = 7
-mpl.rcParams['pdf.fonttype'] = 42
-mpl.rcParams['ps.fonttype'] = 42
-mpl.rcParams['font.family'] = 'arial'
+@functools.lru_cache(maxsize=None)
+def _pyplot():
+    """Import pyplot on first use, importing neurogym does not need it."""
+    import matplotlib as mpl
+    import matplotlib.pyplot as plt
+
+    # TODO: This is changing user's plotting behavior for non-neurogym plots
+    mpl.rcParams['font.size'] = 7
+    mpl.rcParams['pdf.fonttype'] = 42
+    mpl.rcParams['ps.fonttype'] = 42
+    mpl.rcParams['font.family'] = 'arial'
+    return plt
 
 
 def plot_env(env, num_steps=200, num_trials=None, def_act=None, model=None,
@@ -69,7 +74,8 @@ def run_env(env, num_steps=200, num_trials=None, def_act=None, model=None):
     gt = []
     perf = []
     ob = env.reset()  # TODO: not saving this first observation
-    ob_cum_temp = ob
+    # Copy, ob is a view into the env's ob, which must not be accumulated
+    ob_cum_temp = np.array(ob, dtype=float)
 
     if num_trials is not None:
         num_steps = 1e5  # Overwrite num_steps value
@@ -100,11 +106,12 @@ def run_env(env, num_steps=200, num_trials=None, def_act=None, model=None):
 
         if done:
             env.reset()
-        observations.append(ob_aux)
+        # ob and gt may be views into the task's ob and gt, which are reused
+        observations.append(np.array(ob_aux))
         rewards.append(rew)
         actions.append(action)
         if 'gt' in info.keys():
-            gt.append(info['gt'])
+            gt.append(np.array(info['gt']))
         else:
             gt.append(0)
 
@@ -126,8 +133,8 @@ def run_env(env, num_steps=200, num_trials=None, def_act=None, model=None):
         states = None
 
     data = {
-        'ob': np.array(observations).astype(np.float),
-        'ob_cum': np.array(ob_cum).astype(np.float),
+        'ob': np.array(observations, dtype=float),
+        'ob_cum': np.array(ob_cum, dtype=float),
         'rewards': rewards,
         'actions': actions,
         'perf': perf,
@@ -160,8 +167,9 @@ def fig_(ob, actions, gt=None, rewards=None, performance=None, states=None,
         fig_kwargs: figure properties admited by matplotlib.pyplot.subplots() fun.
         env: environment class for extra information
     """
-    ob = np.array(ob)
-    actions = np.array(actions)
+    # No copy if already arrays, e.g. from run_env
+    ob = np.asarray(ob)
+    actions = np.asarray(actions)
 
     if len(ob.shape) == 2:
         return plot_env_1dbox(
@@ -196,6 +204,7 @@ def plot_env_1dbox(
     if not fig_kwargs:
         fig_kwargs = dict(sharex=True, figsize=(5, n_row*1.2))
 
+    plt = _pyplot()
     f, axes = plt.subplots(n_row, 1, **fig_kwargs)
     i_ax = 0
     # ob
@@ -331,6 +340,8 @@ def plot_env_1dbox(
 
 def plot_env_3dbox(ob, actions=None, fname='', env=None):
     """Plot environment with 3-D Box observation space."""
+    import matplotlib.animation as animation
+    plt = _pyplot()
     ob = ob.astype(np.uint8)  # TODO: Temporary
     fig = plt.figure()
     ax = fig.add_axes([0.1, 0.1, 0.8, 0.8])
@@ -363,7 +374,7 @@ def plot_rew_across_training(folder, window=500, ax=None,
         sv_fig = False
         if ax is None:
             sv_fig = True
-            f, ax = plt.subplots(figsize=(8, 8))
+            f, ax = _pyplot().subplots(figsize=(8, 8))
         metric = data[metric_name]
         if isinstance(window, float):
             if window < 1.0:
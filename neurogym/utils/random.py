@@ -15,24 +15,34 @@ def trunc_exp(rng, vmean, vmin=0, vmax=np.inf):
 
 
 class TruncExp(object):
-    def __init__(self, vmean, vmin=0, vmax=np.inf, rng=None):
+    """Truncated exponential distribution.
+
+    Samples are drawn and truncated pool_size at a time, and returned one
+    by one on each call.
+    """
+    def __init__(self, vmean, vmin=0, vmax=np.inf, rng=None, pool_size=4096):
         self.vmean = vmean
         self.vmin = vmin
         self.vmax = vmax
+        self.pool_size = pool_size
         self.rng = np.random.RandomState()
+        self._pool = []
 
     def seed(self, seed=None):
         """Seed the PRNG of this space. """
         self.rng = np.random.RandomState(seed)
+        self._pool = []  # Discard samples from the previous seed
 
     def __call__(self, *args, **kwargs):
         if self.vmin >= self.vmax:  # the > is to avoid issues when making vmin as big as dt
             return self.vmax
         else:
-            while True:
-                v = self.rng.exponential(self.vmean)
-                if self.vmin <= v < self.vmax:
-                    return v
+            while not self._pool:
+                v = self.rng.exponential(self.vmean, size=self.pool_size)
+                v = v[(self.vmin <= v) & (v < self.vmax)]
+                # Reversed so that pop() returns samples in order drawn
+                self._pool = v[::-1].tolist()
+            return self._pool.pop()
 
 
 def random_number_fn(dist, args, rng):
@@ -113,11 +113,13 @@ class Monitor(Wrapper):
 
     def store_data(self, obs, action, rew, info):
         if self.stp_counter <= self.num_stps_sv_fig:
-            self.ob_mat.append(obs)
+            # obs and gt may be views into the task's ob and gt, which are
+            # reused
+            self.ob_mat.append(np.array(obs))
             self.act_mat.append(action)
             self.rew_mat.append(rew)
             if 'gt' in info.keys():
-                self.gt_mat.append(info['gt'])
+                self.gt_mat.append(np.array(info['gt']))
             else:
                 self.gt_mat.append(-1)
             if 'performance' in info.keys():
@@ -29,5 +29,11 @@ class PassAction(Wrapper):
 
     def step(self, action):
         obs, reward, done, info = self.env.step(action)
-        obs = np.concatenate((obs, np.array([action])))
+        # Fill a buffer of the declared dtype, concatenating with a
+        # python scalar would silently upcast obs to float64
+        new_obs = np.empty(self.observation_space.shape,
+                           dtype=self.observation_space.dtype)
+        new_obs[:-1] = obs
+        new_obs[-1] = action
+        obs = new_obs
         return obs, reward, done, info
@@ -49,6 +49,7 @@ class ReactionTime(gym.Wrapper):  # TODO: Make this a trial wrapper instead?
             # change ground truth accordingly
             self.env.gt[self.start_ind[stim]+1: self.env.end_ind[stim]] =\
                 self.env.gt[self.start_ind[dec]]
+            self.env.start_ind[dec] = self.env.start_ind[stim]+1
         obs, reward, done, info = self.env.step(action)
         if info['new_trial']:
             info['tr_dur'] = self.tr_dur
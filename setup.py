@@ -15,6 +15,8 @@ if sys.version_info.major != 3:
 # Environment-specific dependencies.
 extras = {
   'psychopy': ['psychopy'],
+  'numba': ['numba'],
+  'torch': ['torch'],
 }
 
 # Meta dependency groups.